@@ -4,4 +4,5 @@ BASE_INFO = "data/raw/base_info.csv"
 PATH_PROCESSED = "data/processed/"
 PATH_RAW = "data/raw"
 BASE_CADASTRAL = "data/raw/base_cadastral.csv"
-ASSETS = "assets"
\ No newline at end of file
+ASSETS = "assets"
+MODELO_FINAL = "models/modelo_final.json"
\ No newline at end of file
@@ -7,6 +7,8 @@ import numpy as np
 import warnings
 import sys
 import os
+import argparse
+from datetime import datetime
 import xgboost as xgb
 from sklearn.model_selection import StratifiedGroupKFold
 from sklearn.metrics import roc_auc_score, recall_score, precision_score, f1_score
@@ -16,9 +18,9 @@ if 'src' not in sys.path:
     sys.path.append(current_dir)
 
 try:
-    from src.modeling import train_final_model
+    from src.modeling import train_final_model, train_incremental_model, save_model_with_metadata
     from src.feature_engineering import create_advanced_features
-    from src.data_processing import load_and_clean_data, load_data_and_setup_env
+    from src.data_processing import load_and_clean_data, load_data_and_setup_env, save_data_quality_report
 except ImportError as e:
     print(f"Erro ao importar módulos: {e}")
     print("Certifique-se de que está executando a partir da raiz do projeto")
@@ -27,8 +29,15 @@ except ImportError as e:
 warnings.filterwarnings('ignore')
 
 
-def main():
-    """Pipeline principal de treinamento e predição"""
+def main(incremental: bool = False):
+    """
+    Pipeline principal de treinamento e predição.
+
+    Args:
+        incremental (bool): Se True, atualiza o modelo salvo com as safras mais
+            recentes (warm-start) em vez de retreinar do zero com todo o histórico.
+    """
+    from config import MODELO_FINAL, PATH_PROCESSED
 
     print("~*~ INICIANDO PIPELINE DE RISCO DE CRÉDITO ~*~")
     print("=" * 50)
@@ -48,17 +57,26 @@ def main():
     }
     OPTIMAL_THRESHOLD = 0.5883
 
+    quality_report = {'desenvolvimento': {}, 'teste': {}}
+    quality_report_path = os.path.join(
+        path_processed or PATH_PROCESSED, f"qualidade_dados_{datetime.now():%Y%m%d_%H%M%S}.json")
+
     print("\nFASE 1: Preparando dataset de desenvolvimento...")
     try:
-        df_clean_dev = load_and_clean_data(PATH_RAW, is_test_set=False)
-        df_dev_with_features = create_advanced_features(df_clean_dev)
+        df_clean_dev = load_and_clean_data(
+            PATH_RAW, is_test_set=False, quality_report=quality_report['desenvolvimento'])
+        df_dev_with_features = create_advanced_features(
+            df_clean_dev, quality_report=quality_report['desenvolvimento'])
         print(f"Dados carregados e processados")
     except Exception as e:
         print(f"Erro no carregamento: {e}")
         return
+    finally:
+        save_data_quality_report(quality_report, quality_report_path)
 
     y = df_dev_with_features['INADIMPLENTE']
     groups = df_dev_with_features['ID_CLIENTE']
+    safras = df_clean_dev.loc[df_dev_with_features.index, 'SAFRA_REF']
     X_raw = df_dev_with_features.drop(columns=['INADIMPLENTE'])
 
     '''Encoding categórico'''
@@ -74,49 +92,53 @@ def main():
 
     print(f"Dataset preparado: {X.shape[0]} amostras, {X.shape[1]} features")
 
-    '''FASE 2: VALIDAÇÃO CRUZADA'''
-    print("\nFASE 2: Validando modelo com threshold otimizado...")
-    sgkf = StratifiedGroupKFold(n_splits=5, shuffle=True, random_state=42)
     scale_pos_weight = y.value_counts()[0] / y.value_counts()[1]
 
-    auc_scores, recall_scores, precision_scores, f1_scores = [], [], [], []
-
-    for fold, (train_index, val_index) in enumerate(sgkf.split(X, y, groups=groups)):
-        print(f"  Processando fold {fold+1}/5...")
-
-        X_train, X_val = X.iloc[train_index], X.iloc[val_index]
-        y_train, y_val = y.iloc[train_index], y.iloc[val_index]
-
-        model = xgb.XGBClassifier(
-            objective='binary:logistic',
-            eval_metric='auc',
-            scale_pos_weight=scale_pos_weight,
-            use_label_encoder=False,
-            random_state=42,
-            **best_params
-        )
-        model.fit(X_train, y_train)
-
-        '''Predições com threshold otimizado'''
-        y_pred_proba = model.predict_proba(X_val)[:, 1]
-        y_pred_class = (y_pred_proba >= OPTIMAL_THRESHOLD).astype(int)
-
-        '''Métricas'''
-        auc_scores.append(roc_auc_score(y_val, y_pred_proba))
-        recall_scores.append(recall_score(y_val, y_pred_class))
-        precision_scores.append(precision_score(
-            y_val, y_pred_class, zero_division=0))
-        f1_scores.append(f1_score(y_val, y_pred_class))
-
-    print("\nRESULTADOS DA VALIDAÇÃO CRUZADA:")
-    print(
-        f"  -  AUC Médio:       {np.mean(auc_scores):.4f} (+/- {np.std(auc_scores):.4f})")
-    print(
-        f"  -  Recall Médio:    {np.mean(recall_scores):.4f} (+/- {np.std(recall_scores):.4f})")
-    print(
-        f"  -  Precision Médio: {np.mean(precision_scores):.4f} (+/- {np.std(precision_scores):.4f})")
-    print(
-        f"  -  F1-Score Médio:  {np.mean(f1_scores):.4f} (+/- {np.std(f1_scores):.4f})")
+    '''FASE 2: VALIDAÇÃO CRUZADA'''
+    if incremental:
+        print("\nFASE 2: Ignorada no modo incremental (validação no holdout da safra mais recente)")
+    else:
+        print("\nFASE 2: Validando modelo com threshold otimizado...")
+        sgkf = StratifiedGroupKFold(n_splits=5, shuffle=True, random_state=42)
+
+        auc_scores, recall_scores, precision_scores, f1_scores = [], [], [], []
+
+        for fold, (train_index, val_index) in enumerate(sgkf.split(X, y, groups=groups)):
+            print(f"  Processando fold {fold+1}/5...")
+
+            X_train, X_val = X.iloc[train_index], X.iloc[val_index]
+            y_train, y_val = y.iloc[train_index], y.iloc[val_index]
+
+            model = xgb.XGBClassifier(
+                objective='binary:logistic',
+                eval_metric='auc',
+                scale_pos_weight=scale_pos_weight,
+                use_label_encoder=False,
+                random_state=42,
+                **best_params
+            )
+            model.fit(X_train, y_train)
+
+            '''Predições com threshold otimizado'''
+            y_pred_proba = model.predict_proba(X_val)[:, 1]
+            y_pred_class = (y_pred_proba >= OPTIMAL_THRESHOLD).astype(int)
+
+            '''Métricas'''
+            auc_scores.append(roc_auc_score(y_val, y_pred_proba))
+            recall_scores.append(recall_score(y_val, y_pred_class))
+            precision_scores.append(precision_score(
+                y_val, y_pred_class, zero_division=0))
+            f1_scores.append(f1_score(y_val, y_pred_class))
+
+        print("\nRESULTADOS DA VALIDAÇÃO CRUZADA:")
+        print(
+            f"  -  AUC Médio:       {np.mean(auc_scores):.4f} (+/- {np.std(auc_scores):.4f})")
+        print(
+            f"  -  Recall Médio:    {np.mean(recall_scores):.4f} (+/- {np.std(recall_scores):.4f})")
+        print(
+            f"  -  Precision Médio: {np.mean(precision_scores):.4f} (+/- {np.std(precision_scores):.4f})")
+        print(
+            f"  -  F1-Score Médio:  {np.mean(f1_scores):.4f} (+/- {np.std(f1_scores):.4f})")
 
     '''FASE 3: MODELO FINAL E SUBMISSÃO'''
     print("\n FASE 3: Treinando modelo final e gerando submissão...")
@@ -129,14 +151,23 @@ def main():
         'random_state': 42,
         **best_params
     }
-    final_model = train_final_model(X, y, xgb.XGBClassifier, xgb_final_params)
+    if incremental:
+        final_model = train_incremental_model(
+            X, y, safras, xgb.XGBClassifier, xgb_final_params, MODELO_FINAL)
+    else:
+        final_model = train_final_model(
+            X, y, xgb.XGBClassifier, xgb_final_params)
+        save_model_with_metadata(
+            final_model, MODELO_FINAL, safras.max(), np.mean(auc_scores))
+    model_columns = final_model.get_booster().feature_names or list(X.columns)
 
     try:
-        df_clean_test = load_and_clean_data(PATH_RAW, is_test_set=True)
+        df_clean_test = load_and_clean_data(
+            PATH_RAW, is_test_set=True, quality_report=quality_report['teste'])
         print(f" Registros carregados: {len(df_clean_test)}")
 
         df_teste_with_features = create_advanced_features(
-            df_clean_test, is_test_set=True)
+            df_clean_test, is_test_set=True, quality_report=quality_report['teste'])
         print(f" Registros após features: {len(df_teste_with_features)}")
 
         submission_ids = df_teste_with_features[[
@@ -149,7 +180,8 @@ def main():
             X_teste_raw, columns=categorical_cols_test, drop_first=True)
         X_teste_processed = X_teste_processed.drop(
             columns=[col for col in cols_to_drop if col in X_teste_processed.columns])
-        X_teste = X_teste_processed.reindex(columns=X.columns, fill_value=0)
+        X_teste = X_teste_processed.reindex(
+            columns=model_columns, fill_value=0)
 
         print(f"Base de teste preparada: {X_teste.shape[0]} registros")
 
@@ -181,11 +213,19 @@ def main():
     except Exception as e:
         print(f"Erro no processamento de teste: {e}")
         return None
+    finally:
+        save_data_quality_report(quality_report, quality_report_path)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Pipeline de treinamento e predição de risco de crédito')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Atualiza o modelo salvo com as safras mais recentes em vez de retreinar do zero')
+    args = parser.parse_args()
+
     try:
-        result = main()
+        result = main(incremental=args.incremental)
         if result is not None:
             print("\nExecução finalizada sem erros!")
         else:
@@ -1,9 +1,9 @@
 import os
+import json
 import pandas as pd
 import numpy as np
 
 
-
 def load_data_and_setup_env(project_root_path: str):
     """
     Carrega os datasets principais e garante que os diretórios necessários existam.
@@ -56,7 +56,18 @@ def load_data_and_setup_env(project_root_path: str):
         return None, None, None, None, None, None, None, None
     
     
-def load_and_clean_data(path_to_raw_data: str, is_test_set: bool = False) -> pd.DataFrame:
+def _to_datetime(series: pd.Series, coerced_dates: dict = None, name: str = None) -> pd.Series:
+    """
+    Converte a série para datetime e, se `coerced_dates` for informado, registra
+    em `coerced_dates[name]` quantos valores não nulos foram coagidos para NaT.
+    """
+    parsed = pd.to_datetime(series, errors='coerce')
+    if coerced_dates is not None:
+        coerced_dates[name] = int((parsed.isna() & series.notna()).sum())
+    return parsed
+
+
+def load_and_clean_data(path_to_raw_data: str, is_test_set: bool = False, quality_report: dict = None) -> pd.DataFrame:
     """
     Carrega os dados brutos, realiza a limpeza inicial, conversões de tipo,
     cria a variável-alvo (apenas para o dataset de treino) e une as bases.
@@ -64,6 +75,10 @@ def load_and_clean_data(path_to_raw_data: str, is_test_set: bool = False) -> pd.
     Args:
         path_to_raw_data (str): O caminho para a pasta contendo os arquivos .csv brutos.
         is_test_set (bool): Flag para indicar se estamos carregando o conjunto de teste.
+        quality_report (dict): Se informado, é preenchido com o perfil de qualidade da
+            ingestão (datas coagidas, nulos por coluna de cada base de origem, IDs
+            órfãos, joins sem match e linhas removidas), calculado junto com a
+            conversão e os merges. Se None, nenhum perfil é calculado.
 
     Returns:
         pd.DataFrame: Um DataFrame limpo e unido, pronto para a engenharia de features.
@@ -83,30 +98,75 @@ def load_and_clean_data(path_to_raw_data: str, is_test_set: bool = False) -> pd.
         f'{path_to_raw_data}/base_cadastral.csv', delimiter=';')
     base_info = pd.read_csv(f'{path_to_raw_data}/base_info.csv', delimiter=';')
 
+    profile = quality_report is not None
+    coerced_dates = None
+    if profile:
+        coerced_dates = quality_report.setdefault('coerced_dates', {})
+        quality_report.setdefault('rows_dropped', {})
+        quality_report['rows_read'] = {'base_pagamentos': len(base_pagamentos),
+                                       'base_cadastral': len(base_cadastral),
+                                       'base_info': len(base_info)}
+        # Nulos das bases de origem, contados antes da coerção de datas e dos merges
+        # para não se sobrepor a 'coerced_dates' nem aos nulos criados pelos joins
+        quality_report['nulls_per_column'] = {
+            name: {col: int(n) for col, n in base.isna().sum().items()}
+            for name, base in [('base_pagamentos', base_pagamentos),
+                               ('base_cadastral', base_cadastral),
+                               ('base_info', base_info)]}
+
     date_cols_pagamentos = ['DATA_VENCIMENTO',
                             'DATA_EMISSAO_DOCUMENTO', 'SAFRA_REF']
     if not is_test_set:
         date_cols_pagamentos.append('DATA_PAGAMENTO')
 
     for col in date_cols_pagamentos:
-        base_pagamentos[col] = pd.to_datetime(
-            base_pagamentos[col], errors='coerce')
+        base_pagamentos[col] = _to_datetime(
+            base_pagamentos[col], coerced_dates, f'base_pagamentos.{col}')
 
-    base_cadastral['DATA_CADASTRO'] = pd.to_datetime(
-        base_cadastral['DATA_CADASTRO'], errors='coerce')
-    base_info['SAFRA_REF'] = pd.to_datetime(
-        base_info['SAFRA_REF'], errors='coerce')
+    base_cadastral['DATA_CADASTRO'] = _to_datetime(
+        base_cadastral['DATA_CADASTRO'], coerced_dates, 'base_cadastral.DATA_CADASTRO')
+    base_info['SAFRA_REF'] = _to_datetime(
+        base_info['SAFRA_REF'], coerced_dates, 'base_info.SAFRA_REF')
 
     if not is_test_set:
+        n_rows = len(base_pagamentos)
         base_pagamentos.dropna(subset=['DATA_PAGAMENTO'], inplace=True)
+        if profile:
+            quality_report['rows_dropped']['DATA_PAGAMENTO_nula'] = n_rows - len(base_pagamentos)
         dias_de_atraso = (
             base_pagamentos['DATA_PAGAMENTO'] - base_pagamentos['DATA_VENCIMENTO']).dt.days
         base_pagamentos['INADIMPLENTE'] = np.where(dias_de_atraso >= 5, 1, 0)
 
-    df_merged = pd.merge(base_pagamentos, base_cadastral,
-                         on='ID_CLIENTE', how='left')
-    df_clean = pd.merge(df_merged, base_info, on=[
-                        'ID_CLIENTE', 'SAFRA_REF'], how='left')
+    # O indicator dos merges já marca as linhas sem correspondência, sem passada extra
+    df_merged = pd.merge(base_pagamentos, base_cadastral, on='ID_CLIENTE', how='left',
+                         indicator='_merge_cadastral' if profile else False)
+    df_clean = pd.merge(df_merged, base_info, on=['ID_CLIENTE', 'SAFRA_REF'], how='left',
+                        indicator='_merge_info' if profile else False)
+
+    if profile:
+        orphans = df_clean['_merge_cadastral'] == 'left_only'
+        quality_report['orphan_client_ids'] = {
+            'rows': int(orphans.sum()),
+            'clients': int(df_clean.loc[orphans, 'ID_CLIENTE'].nunique())}
+        quality_report['unmatched_info_joins'] = int(
+            (df_clean['_merge_info'] == 'left_only').sum())
+        df_clean.drop(columns=['_merge_cadastral', '_merge_info'], inplace=True)
+        quality_report['rows_output'] = len(df_clean)
 
     print("Processamento de dados concluído.")
     return df_clean
+
+
+def save_data_quality_report(quality_report: dict, report_path: str):
+    """
+    Salva o relatório de qualidade dos dados da execução em JSON.
+
+    Args:
+        quality_report (dict): Relatório preenchido por `load_and_clean_data` e
+            `create_advanced_features`.
+        report_path (str): Caminho do arquivo .json de saída.
+    """
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(quality_report, f, ensure_ascii=False, indent=2)
+    print(f"Relatório de qualidade dos dados salvo em {report_path}")
@@ -2,9 +2,12 @@ import pandas as pd
 import numpy as np
 
 
-def create_advanced_features(df: pd.DataFrame, training_columns: list = None, is_test_set: bool = False) -> pd.DataFrame:
+def create_advanced_features(df: pd.DataFrame, training_columns: list = None, is_test_set: bool = False,
+                             quality_report: dict = None) -> pd.DataFrame:
     """
     Recebe um DataFrame limpo e aplica a engenharia de features avançada.
+    Se `quality_report` for informado, registra em 'rows_dropped' as linhas
+    removidas por idade do cliente nula ou negativa.
     """
     print("Iniciando pipeline de engenharia de features...")
     df_features = df.copy()
@@ -42,6 +45,11 @@ def create_advanced_features(df: pd.DataFrame, training_columns: list = None, is
 
     '''Tratamento da idade do cliente'''
     if 'IDADE_CLIENTE_NA_TRANSACAO' in df_features.columns:
+        idade = df_features['IDADE_CLIENTE_NA_TRANSACAO']
+        if quality_report is not None:
+            rows_dropped = quality_report.setdefault('rows_dropped', {})
+            rows_dropped['IDADE_CLIENTE_nula'] = int(idade.isna().sum())
+            rows_dropped['IDADE_CLIENTE_negativa'] = int((idade < 0).sum())
         df_features.dropna(subset=['IDADE_CLIENTE_NA_TRANSACAO'], inplace=True)
         df_features = df_features[df_features['IDADE_CLIENTE_NA_TRANSACAO'] >= 0].copy(
         )
@@ -1,3 +1,5 @@
+import os
+import json
 import pandas as pd
 import numpy as np
 import xgboost as xgb
@@ -89,3 +91,159 @@ def train_final_model(X: pd.DataFrame, y: pd.Series, model_class, model_params:
     final_model.fit(X, y)
     print("Modelo final treinado com sucesso.")
     return final_model
+
+
+def train_incremental_model(X: pd.DataFrame, y: pd.Series, safras: pd.Series, model_class, model_params: dict,
+                            model_path: str, n_new_estimators: int = 50, max_auc_drop: float = 0.02,
+                            max_trees: int = 500):
+    """
+    Atualiza o modelo salvo adicionando árvores treinadas apenas com as safras que
+    ele ainda não viu (continued training do XGBoost via `xgb_model`).
+
+    O modelo salvo fica sempre uma safra atrás: a safra mais recente é o holdout,
+    nunca usado no treino. A cada atualização, as safras posteriores à última safra
+    treinada (registrada nos metadados), exceto a mais recente, recebem
+    `n_new_estimators` árvores novas; o candidato e o modelo anterior são avaliados
+    na safra mais recente, que nenhum dos dois viu. O candidato é salvo exatamente
+    como foi validado, junto com o seu AUC, que vira a referência do mês seguinte.
+
+    Faz o retreino completo se não houver modelo/metadados salvos, se houver drift
+    (o candidato perde mais que `max_auc_drop` de AUC para o modelo anterior ou para
+    a referência), se alguma safra nova tiver uma só classe ou se o booster passar
+    de `max_trees` árvores. Com o padrão de 200 árvores iniciais e 50 por mês, isso
+    resulta em um retreino completo a cada 6 atualizações. Sem safras novas além do
+    holdout já avaliado, o modelo salvo é mantido sem alterações.
+
+    Args:
+        X (pd.DataFrame): DataFrame completo de features.
+        y (pd.Series): Series completa do alvo.
+        safras (pd.Series): SAFRA_REF de cada linha de X (mesmo índice).
+        model_class: A classe do modelo (ex: xgb.XGBClassifier).
+        model_params (dict): Os parâmetros do modelo.
+        model_path (str): Caminho do modelo salvo (.json), lido e sobrescrito.
+        n_new_estimators (int): Número de árvores adicionadas por atualização.
+        max_auc_drop (float): Queda máxima de AUC tolerada antes do retreino completo.
+        max_trees (int): Número máximo de árvores do booster antes do retreino completo.
+
+    Returns:
+        Um objeto de modelo treinado.
+    """
+    safras = safras.loc[X.index]
+    metadata_path = _metadata_path(model_path)
+    if not os.path.exists(model_path) or not os.path.exists(metadata_path):
+        print(f"Modelo anterior ou metadados não encontrados em {model_path}. Retreinando do zero...")
+        return _retrain_and_save(X, y, safras, model_class, model_params, model_path)
+
+    with open(metadata_path, encoding='utf-8') as f:
+        metadata = json.load(f)
+
+    previous_model = model_class()
+    previous_model.load_model(model_path)
+    feature_names = previous_model.get_booster().feature_names
+    if not feature_names:
+        print("Modelo anterior sem nomes de features. Retreinando do zero...")
+        return _retrain_and_save(X, y, safras, model_class, model_params, model_path)
+
+    safras_nao_treinadas = np.sort(
+        safras[safras > pd.Timestamp(metadata['last_safra'])].unique())
+    if len(safras_nao_treinadas) == 0 or (
+            len(safras_nao_treinadas) == 1 and metadata.get('holdout_safra') is not None and
+            safras_nao_treinadas[0] == pd.Timestamp(metadata['holdout_safra'])):
+        print("Nenhuma safra nova desde a última atualização. Mantendo o modelo salvo.")
+        return previous_model
+    if len(safras_nao_treinadas) == 1:
+        print("Apenas uma safra não vista: não há holdout para validar árvores novas. Retreinando do zero...")
+        return _retrain_and_save(X, y, safras, model_class, model_params, model_path)
+
+    if previous_model.get_booster().num_boosted_rounds() + n_new_estimators > max_trees:
+        print(f"Booster atingiria mais de {max_trees} árvores. Retreinando do zero...")
+        return _retrain_and_save(X, y, safras, model_class, model_params, model_path)
+
+    safras_treino, safra_holdout = safras_nao_treinadas[:-1], safras_nao_treinadas[-1]
+    mask_holdout = (safras == safra_holdout).values
+    if y[mask_holdout].nunique() < 2 or any(
+            y[(safras == safra).values].nunique() < 2 for safra in safras_treino):
+        print("Safra nova ou holdout sem as duas classes. Retreinando do zero...")
+        return _retrain_and_save(X, y, safras, model_class, model_params, model_path)
+
+    # Alinha as colunas do get_dummies com as features vistas pelo booster anterior
+    X_alinhado = X.reindex(columns=feature_names, fill_value=0)
+    mask_novas = safras.isin(safras_treino).values
+    X_holdout, y_holdout = X_alinhado[mask_holdout], y[mask_holdout]
+
+    print(f"Treino incremental com {mask_novas.sum()} amostras novas "
+          f"(holdout: {len(X_holdout)} amostras)...")
+    candidate_model = model_class(
+        **{**model_params, 'n_estimators': n_new_estimators})
+    candidate_model.fit(X_alinhado[mask_novas], y[mask_novas],
+                        xgb_model=previous_model.get_booster())
+
+    auc_anterior = roc_auc_score(
+        y_holdout, previous_model.predict_proba(X_holdout)[:, 1])
+    auc_candidato = roc_auc_score(
+        y_holdout, candidate_model.predict_proba(X_holdout)[:, 1])
+    auc_referencia = metadata.get('auc_holdout')
+    print(f"  -  AUC holdout (modelo anterior):  {auc_anterior:.4f}")
+    print(f"  -  AUC holdout (modelo candidato): {auc_candidato:.4f}")
+
+    if (auc_candidato < auc_anterior - max_auc_drop or
+            (auc_referencia is not None and auc_candidato < auc_referencia - max_auc_drop)):
+        print(f"Queda de AUC acima de {max_auc_drop} (drift). Retreinando do zero...")
+        return _retrain_and_save(X, y, safras, model_class, model_params, model_path)
+
+    print("Modelo incremental aprovado.")
+    save_model_with_metadata(candidate_model, model_path, safras_treino[-1],
+                             auc_candidato, safra_holdout)
+    return candidate_model
+
+
+def save_model_with_metadata(model, model_path: str, last_safra, auc_holdout: float = None,
+                             holdout_safra=None):
+    """
+    Salva o booster e, ao lado dele, os metadados usados pelo treino incremental.
+
+    Args:
+        model: Um modelo XGBoost já treinado.
+        model_path (str): Caminho do arquivo .json do modelo.
+        last_safra: Última SAFRA_REF usada no treino do modelo.
+        auc_holdout (float): AUC fora da amostra do próprio modelo salvo.
+        holdout_safra: SAFRA_REF em que `auc_holdout` foi medido (None se veio da validação cruzada).
+    """
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    model.save_model(model_path)
+    metadata = {
+        'last_safra': pd.Timestamp(last_safra).strftime('%Y-%m-%d'),
+        'holdout_safra': None if holdout_safra is None else pd.Timestamp(holdout_safra).strftime('%Y-%m-%d'),
+        'auc_holdout': None if auc_holdout is None else float(auc_holdout),
+    }
+    with open(_metadata_path(model_path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    print(f"Modelo salvo em {model_path} (última safra treinada: {metadata['last_safra']}).")
+
+
+def _metadata_path(model_path: str) -> str:
+    return os.path.splitext(model_path)[0] + '_meta.json'
+
+
+def _retrain_and_save(X: pd.DataFrame, y: pd.Series, safras: pd.Series, model_class, model_params: dict,
+                      model_path: str):
+    """
+    Retreina o modelo com todo o histórico exceto a safra mais recente, que é usada
+    como holdout para registrar o AUC de referência das próximas atualizações.
+    """
+    safras_ordenadas = np.sort(safras.dropna().unique())
+    mask_holdout = (safras == safras_ordenadas[-1]).values
+    y_holdout = y[mask_holdout]
+    if len(safras_ordenadas) < 2 or y_holdout.nunique() < 2:
+        final_model = train_final_model(X, y, model_class, model_params)
+        save_model_with_metadata(final_model, model_path, safras_ordenadas[-1])
+        return final_model
+
+    final_model = train_final_model(
+        X[~mask_holdout], y[~mask_holdout], model_class, model_params)
+    auc_holdout = roc_auc_score(
+        y_holdout, final_model.predict_proba(X[mask_holdout])[:, 1])
+    print(f"  -  AUC holdout ({pd.Timestamp(safras_ordenadas[-1]):%Y-%m}): {auc_holdout:.4f}")
+    save_model_with_metadata(final_model, model_path, safras_ordenadas[-2],
+                             auc_holdout, safras_ordenadas[-1])
+    return final_model